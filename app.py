@@ -1,9 +1,12 @@
 import streamlit as st
 import json
 import os
-from transformers import AutoModel, AutoTokenizer
-from utils.pdf_processor import extract_text_from_pdf, split_into_sentences, filter_sentences
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.pdf_processor import PDF_WORKERS, extract_text_from_pdf, split_and_filter_sentences
 from utils.vector_search import VectorSearch
+from utils.model_loader import load_causal_model, predict_sentences
 import torch
 
 # Set page config
@@ -13,6 +16,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Question words dropped from queries before searching
+QUESTION_WORDS = frozenset({'what', 'are', 'the', 'of', 'is', 'does', 'cause', 'effect', 'causes', 'effects', '?'})
+
 # Initialize session state
 if 'model' not in st.session_state:
     st.session_state.model = None
@@ -22,72 +28,141 @@ if 'vector_search' not in st.session_state:
     st.session_state.vector_search = None
 if 'causal_results' not in st.session_state:
     st.session_state.causal_results = []
+if 'prediction_cache' not in st.session_state:
+    st.session_state.prediction_cache = {}
 
 @st.cache_resource
 def load_model():
     """Load the SocioCausaNet model and tokenizer"""
-    repo_id = "rasoultilburg/SocioCausaNet"
-    model = AutoModel.from_pretrained(repo_id, trust_remote_code=True)
-    tokenizer = AutoTokenizer.from_pretrained(repo_id)
-    return model, tokenizer
+    return load_causal_model()
+
+def extract_file_sentences(uploaded_file, min_chars=15, max_chars=100):
+    """Extract the filtered sentences of a single uploaded PDF file"""
+    # Extract text from PDF
+    text = extract_text_from_pdf(uploaded_file)
+    
+    # Split into sentences and filter them based on character count
+    return split_and_filter_sentences(text, min_chars, max_chars)
 
-def process_pdf_files(uploaded_files, model, tokenizer, min_chars=15, max_chars=100):
+def predict_batches(model, tokenizer, sentence_queue, batch_size, prediction_cache, progress_queue, stop_event):
+    """
+    Run the model over sentences batch by batch as they arrive (meant for a worker thread)
+    
+    Lists of new sentences are taken from sentence_queue until None arrives.
+    While more may still come only full batches run, shortest sentences
+    first, so batches stay close in length; the rest runs at the end.
+    Predictions are stored in prediction_cache and the size of each finished
+    batch is put on progress_queue so the Streamlit thread can report it.
+    Stops early once stop_event is set.
+    """
+    pending = []
+    more_coming = True
+    while more_coming:
+        sentences = sentence_queue.get()
+        if sentences is None:
+            more_coming = False
+        else:
+            pending.extend(sentences)
+        
+        # Batch sentences of similar length so short sentences aren't
+        # padded up to the longest one in their batch
+        pending.sort(key=len)
+        while len(pending) >= batch_size or (pending and not more_coming):
+            if stop_event.is_set():
+                return
+            batch_sentences = pending[:batch_size]
+            del pending[:batch_size]
+            
+            # Get predictions from the model
+            results = predict_sentences(model, tokenizer, batch_sentences)
+            prediction_cache.update(zip(batch_sentences, results))
+            progress_queue.put(len(batch_sentences))
+
+def process_pdf_files(uploaded_files, model, tokenizer, min_chars=15, max_chars=100, prediction_cache=None):
     """Process uploaded PDF files and extract causal relationships"""
+    if prediction_cache is None:
+        prediction_cache = {}
     all_results = []
     all_sentences = []
     
     progress_bar = st.progress(0)
     status_text = st.empty()
     
-    # Calculate total sentences first for accurate progress
     total_files = len(uploaded_files)
+    batch_size = 32
     
-    for file_idx, uploaded_file in enumerate(uploaded_files):
-        status_text.text(f"📄 Processing {uploaded_file.name} ({file_idx + 1}/{total_files})...")
-        
-        # Extract text from PDF
-        text = extract_text_from_pdf(uploaded_file)
-        
-        # Split into sentences
-        sentences = split_into_sentences(text)
-        
-        # Filter sentences based on character count
-        filtered_sentences = filter_sentences(sentences, min_chars, max_chars)
-        
-        status_text.text(f"🔍 Analyzing {len(filtered_sentences)} sentences from {uploaded_file.name}...")
-        
-        # Process sentences in batches
-        batch_size = 32
-        num_batches = (len(filtered_sentences) + batch_size - 1) // batch_size
+    # Pool (source, sentence) pairs from every file so batches stay full
+    # across file boundaries instead of ending each file with a short batch
+    pooled_sentences = []
+    # Sentences handed to the model; repeats (section headers, overlapping
+    # papers) and sentences seen in earlier runs come from the cache
+    queued_sentences = set()
+    num_queued = 0
+    num_done = 0
+    
+    def wait_for_progress():
+        """Wait briefly for a finished batch and redraw the progress bar"""
+        nonlocal num_done
+        try:
+            num_done += progress_queue.get(timeout=0.1)
+        except queue.Empty:
+            return False
+        progress_bar.progress(min(num_done / max(num_queued, 1), 1.0))
+        return True
+    
+    # Inference runs off the script thread and starts on the first file's
+    # sentences while the remaining files are still being extracted
+    sentence_queue = queue.Queue()
+    progress_queue = queue.Queue()
+    stop_event = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as inference, \
+            ThreadPoolExecutor(max_workers=PDF_WORKERS) as extraction:
+        worker = inference.submit(
+            predict_batches, model, tokenizer, sentence_queue,
+            batch_size, prediction_cache, progress_queue, stop_event
+        )
         
-        for batch_idx in range(0, len(filtered_sentences), batch_size):
-            batch = filtered_sentences[batch_idx:batch_idx+batch_size]
-            current_batch = (batch_idx // batch_size) + 1
-            
-            # Update progress within current file
-            file_progress = file_idx / total_files
-            batch_progress = (current_batch / num_batches) / total_files
-            total_progress = file_progress + batch_progress
-            progress_bar.progress(min(total_progress, 1.0))
-            
-            status_text.text(f"🔍 {uploaded_file.name} - Batch {current_batch}/{num_batches} ({file_idx + 1}/{total_files} files)")
+        try:
+            # Extract all files concurrently; results are collected in upload order
+            futures = [
+                extraction.submit(extract_file_sentences, uploaded_file, min_chars, max_chars)
+                for uploaded_file in uploaded_files
+            ]
+            for file_idx, (uploaded_file, future) in enumerate(zip(uploaded_files, futures)):
+                status_text.text(f"📄 Processing {uploaded_file.name} ({file_idx + 1}/{total_files})...")
+                while not future.done():
+                    wait_for_progress()
+                filtered_sentences = future.result()
+                pooled_sentences.extend((uploaded_file.name, sentence) for sentence in filtered_sentences)
+                
+                new_sentences = [
+                    sentence for sentence in dict.fromkeys(filtered_sentences)
+                    if sentence not in queued_sentences and sentence not in prediction_cache
+                ]
+                queued_sentences.update(new_sentences)
+                num_queued += len(new_sentences)
+                sentence_queue.put(new_sentences)
+            sentence_queue.put(None)
             
-            # Get predictions from the model
-            results = model.predict(
-                batch,
-                tokenizer=tokenizer,
-                rel_mode="neural",
-                rel_threshold=0.5,
-                cause_decision="cls+span"
-            )
-            
-            # Add source information
-            for result in results:
-                result['source'] = uploaded_file.name
-                if result.get('causal', False):
-                    all_results.append(result)
-            
-            all_sentences.extend(batch)
+            status_text.text(f"🔍 Analyzing {num_queued} new sentences from {total_files} file(s)...")
+            while not worker.done() or not progress_queue.empty():
+                if wait_for_progress():
+                    status_text.text(f"🔍 Analyzed {num_done}/{num_queued} sentences ({total_files} files)")
+        finally:
+            # A rerun interrupts this thread; don't keep the worker going
+            stop_event.set()
+            sentence_queue.put(None)
+        
+        # Re-raise any error from the worker
+        worker.result()
+    
+    # Add source information, back in document order
+    for source, sentence in pooled_sentences:
+        result = dict(prediction_cache[sentence])
+        result['source'] = source
+        if result.get('causal', False):
+            all_results.append(result)
+        all_sentences.append(sentence)
     
     progress_bar.progress(1.0)
     status_text.text("✅ Processing complete!")
@@ -141,7 +216,8 @@ def main():
                             st.session_state.model,
                             st.session_state.tokenizer,
                             min_chars,
-                            max_chars
+                            max_chars,
+                            st.session_state.prediction_cache
                         )
                         
                         st.session_state.causal_results = results
@@ -210,8 +286,7 @@ def main():
                         query_clean = query.lower().strip()
                         
                         # Remove common question words for better matching
-                        question_words = ['what', 'are', 'the', 'of', 'is', 'does', 'cause', 'effect', 'causes', 'effects', '?']
-                        query_terms = [word for word in query_clean.split() if word not in question_words]
+                        query_terms = [word for word in query_clean.split() if word not in QUESTION_WORDS]
                         
                         # Use cleaned query if available, otherwise use original
                         search_query = ' '.join(query_terms) if query_terms else query
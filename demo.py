@@ -3,8 +3,8 @@ Demo script with sample text data
 Use this to test the causal extraction without needing PDF files
 """
 
-from transformers import AutoModel, AutoTokenizer
 import json
+from utils.model_loader import load_causal_model, predict_sentences
 from utils.vector_search import VectorSearch
 
 # Sample text from different domains
@@ -42,9 +42,7 @@ def run_demo():
     
     # Load model
     print("\n📥 Loading SocioCausaNet model...")
-    repo_id = "rasoultilburg/SocioCausaNet"
-    model = AutoModel.from_pretrained(repo_id, trust_remote_code=True)
-    tokenizer = AutoTokenizer.from_pretrained(repo_id)
+    model, tokenizer = load_causal_model(compile_model=False)
     print("✓ Model loaded!\n")
     
     all_results = []
@@ -61,13 +59,7 @@ def run_demo():
         print(f"Processing {len(sentences)} sentences...\n")
         
         # Get predictions
-        results = model.predict(
-            sentences,
-            tokenizer=tokenizer,
-            rel_mode="neural",
-            rel_threshold=0.5,
-            cause_decision="cls+span"
-        )
+        results = predict_sentences(model, tokenizer, sentences)
         
         # Add domain info
         for result in results:
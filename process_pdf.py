@@ -5,11 +5,11 @@ Processes 'mapping phenomena relevant.pdf' directly
 
 import sys
 import json
-from transformers import AutoModel, AutoTokenizer
-import PyPDF2
+import pymupdf
 import nltk
 from nltk.tokenize import sent_tokenize
 import re
+from utils.model_loader import load_causal_model, predict_sentences
 
 # Download NLTK data
 try:
@@ -21,11 +21,8 @@ except LookupError:
 def extract_text_from_pdf(pdf_path):
     """Extract text from PDF file"""
     print(f"Extracting text from {pdf_path}...")
-    with open(pdf_path, 'rb') as file:
-        pdf_reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
+    with pymupdf.open(pdf_path) as doc:
+        text = "".join(page.get_text() + "\n" for page in doc)
     return text
 
 def split_and_filter_sentences(text, min_chars=15, max_chars=100):
@@ -77,9 +74,7 @@ def process_pdf(pdf_path):
     print("Loading SocioCausaNet model...")
     print("(This may take a while on first run - downloading ~500MB)")
     try:
-        repo_id = "rasoultilburg/SocioCausaNet"
-        model = AutoModel.from_pretrained(repo_id, trust_remote_code=True)
-        tokenizer = AutoTokenizer.from_pretrained(repo_id)
+        model, tokenizer = load_causal_model()
         print("✓ Model loaded!\n")
     except Exception as e:
         print(f"✗ Error loading model: {e}")
@@ -87,8 +82,7 @@ def process_pdf(pdf_path):
         try:
             from huggingface_hub import login
             # Try without token first
-            model = AutoModel.from_pretrained(repo_id, trust_remote_code=True, token=False)
-            tokenizer = AutoTokenizer.from_pretrained(repo_id, token=False)
+            model, tokenizer = load_causal_model(token=False)
             print("✓ Model loaded!\n")
         except Exception as e2:
             print(f"✗ Still failed: {e2}")
@@ -110,13 +104,7 @@ def process_pdf(pdf_path):
         print(f"  Batch {batch_num}/{total_batches} ({len(batch)} sentences)...")
         
         try:
-            results = model.predict(
-                batch,
-                tokenizer=tokenizer,
-                rel_mode="neural",
-                rel_threshold=0.5,
-                cause_decision="cls+span"
-            )
+            results = predict_sentences(model, tokenizer, batch)
             
             # Add source info and filter causal
             for result in results:
@@ -3,8 +3,8 @@ Simple test script to verify the SocioCausaNet model works correctly
 Run this before using the Streamlit app to ensure everything is set up properly
 """
 
-from transformers import AutoModel, AutoTokenizer
 import json
+from utils.model_loader import load_causal_model, predict_sentences
 
 def test_model():
     """Test the SocioCausaNet model with sample sentences"""
@@ -15,9 +15,7 @@ def test_model():
     # Load model
     print("\n1. Loading model and tokenizer...")
     try:
-        repo_id = "rasoultilburg/SocioCausaNet"
-        model = AutoModel.from_pretrained(repo_id, trust_remote_code=True)
-        tokenizer = AutoTokenizer.from_pretrained(repo_id)
+        model, tokenizer = load_causal_model(compile_model=False)
         print("✓ Model loaded successfully!")
     except Exception as e:
         print(f"✗ Error loading model: {e}")
@@ -33,13 +31,7 @@ def test_model():
     
     try:
         # Get predictions
-        results = model.predict(
-            sentences,
-            tokenizer=tokenizer,
-            rel_mode="neural",
-            rel_threshold=0.5,
-            cause_decision="cls+span"
-        )
+        results = predict_sentences(model, tokenizer, sentences)
         print("✓ Model predictions completed!")
         
         # Print results
@@ -0,0 +1,231 @@
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+REPO_ID = "rasoultilburg/SocioCausaNet"
+PREDICT_KWARGS = {
+    "rel_mode": "neural",
+    "rel_threshold": 0.5,
+    "cause_decision": "cls+span"
+}
+
+# Padded batches are rounded up to this many tokens, and a compiled encoder
+# always gets batches of COMPILED_BATCH_SIZE sentences (short ones are filled
+# up with FILLER_SENTENCE), so it only ever sees a few distinct input shapes
+PAD_TO_MULTIPLE_OF = 32
+COMPILED_BATCH_SIZE = 32
+FILLER_SENTENCE = "Insomnia causes depression and a lack of concentration in children."
+
+class DeviceTokenizer:
+    """Tokenizer wrapper that moves encoded tensors onto the model's device"""
+
+    def __init__(self, tokenizer, device, pad_to_multiple_of=None):
+        self._tokenizer = tokenizer
+        self._device = device
+        self._pad_to_multiple_of = pad_to_multiple_of
+
+    def __call__(self, *args, **kwargs):
+        if self._pad_to_multiple_of and kwargs.get("padding"):
+            kwargs.setdefault("pad_to_multiple_of", self._pad_to_multiple_of)
+        encoding = self._tokenizer(*args, **kwargs)
+        for key, value in encoding.items():
+            if isinstance(value, torch.Tensor):
+                encoding[key] = value.to(self._device)
+        return encoding
+
+    def __getattr__(self, name):
+        return getattr(self._tokenizer, name)
+
+def _from_pretrained_fast_attention(repo_id, **kwargs):
+    """
+    Load the model with fused scaled-dot-product attention
+
+    Prefers the native SDPA attention of transformers. If the remote model
+    code does not support it, fall back to optimum's BetterTransformer, which
+    only swaps the encoder layers it recognizes and leaves the causal heads
+    untouched.
+
+    Args:
+        repo_id: Hugging Face repository of the model
+        **kwargs: Extra arguments for from_pretrained
+
+    Returns:
+        The loaded model
+    """
+    try:
+        return AutoModel.from_pretrained(repo_id, attn_implementation="sdpa", **kwargs)
+    except (ValueError, TypeError):
+        model = AutoModel.from_pretrained(repo_id, **kwargs)
+
+    try:
+        from optimum.bettertransformer import BetterTransformer
+        model = BetterTransformer.transform(model)
+    except (ImportError, NotImplementedError, ValueError):
+        pass  # keep the stock attention
+
+    return model
+
+def _load_cached_first(load, repo_id, **kwargs):
+    """
+    Load from the local Hugging Face cache, contacting the Hub only on a miss
+
+    Skips the Hub round trips (and remote code re-checks) on every start once
+    the model has been downloaded.
+
+    Args:
+        load: A from_pretrained style callable
+        repo_id: Hugging Face repository of the model
+        **kwargs: Extra arguments for load
+
+    Returns:
+        The loaded object
+    """
+    if kwargs.get("local_files_only"):
+        return load(repo_id, **kwargs)
+    try:
+        return load(repo_id, local_files_only=True, **kwargs)
+    except OSError:
+        return load(repo_id, **kwargs)
+
+def _find_encoder(model):
+    """
+    Locate the transformer encoder inside the SocioCausaNet wrapper
+
+    Args:
+        model: The loaded model
+
+    Returns:
+        tuple: (attribute name, encoder module), or (None, None) if not found
+    """
+    for name in (getattr(model, "base_model_prefix", ""), "bert", "roberta", "encoder"):
+        module = getattr(model, name, None) if name else None
+        if isinstance(module, torch.nn.Module) and module is not model:
+            return name, module
+    return None, None
+
+def _quantize_encoder(model):
+    """
+    Quantize the encoder's linear layers to int8 for CPU inference
+
+    Weights are stored as int8 and activations are quantized on the fly. The
+    custom heads stay in FP32 so relation scoring keeps its precision.
+
+    Args:
+        model: The loaded model
+    """
+    _, encoder = _find_encoder(model)
+    if encoder is None:
+        return
+    torch.ao.quantization.quantize_dynamic(
+        encoder, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+def _compile_encoder(model, tokenizer):
+    """
+    Compile the encoder with torch.compile and warm it up
+
+    Only the encoder is compiled; the custom heads and the decoding logic in
+    predict() stay in eager mode. If compilation fails (e.g. no C++ toolchain
+    is installed) the original encoder is put back. CUDA graphs
+    ("reduce-overhead") are not used: they keep per-thread state, and
+    inference runs on a different thread than this warm-up.
+
+    Args:
+        model: The loaded model
+        tokenizer: Tokenizer passed to predict()
+    """
+    name, encoder = _find_encoder(model)
+    if encoder is None or not hasattr(torch, "compile"):
+        return
+
+    setattr(model, name, torch.compile(encoder, dynamic=False))
+    # Remembered so predict_sentences() can fall back to eager mode
+    model._eager_encoder = (name, encoder)
+    try:
+        # Run one full batch so the first user batch doesn't pay for compilation
+        predict_sentences(model, tokenizer, [FILLER_SENTENCE] * COMPILED_BATCH_SIZE)
+    except Exception:
+        _restore_eager_encoder(model)
+
+def _restore_eager_encoder(model):
+    """Put back the encoder replaced by _compile_encoder()"""
+    saved = model.__dict__.pop("_eager_encoder", None)
+    if saved is not None:
+        name, encoder = saved
+        setattr(model, name, encoder)
+
+def load_causal_model(repo_id=REPO_ID, compile_model=True, quantize=True, **kwargs):
+    """
+    Load the SocioCausaNet model and tokenizer for inference
+
+    The model runs in FP16 on the GPU when CUDA is available. On CPU the
+    encoder is dynamically quantized to int8 unless quantize is False.
+
+    Args:
+        repo_id: Hugging Face repository of the model
+        compile_model: Compile the encoder with torch.compile (worth it when
+            many batches will be processed)
+        quantize: Use int8 dynamic quantization for the encoder on CPU
+        **kwargs: Extra arguments for from_pretrained (e.g. token)
+
+    Returns:
+        tuple: (model, tokenizer)
+    """
+    use_cuda = torch.cuda.is_available()
+    model = _load_cached_first(
+        _from_pretrained_fast_attention,
+        repo_id,
+        trust_remote_code=True,
+        torch_dtype=torch.float16 if use_cuda else torch.float32,
+        **kwargs
+    )
+    model.eval()
+    # Grad mode is per thread; predict_sentences() also uses inference_mode
+    torch.set_grad_enabled(False)
+    if use_cuda:
+        model.to("cuda")
+    elif quantize:
+        _quantize_encoder(model)
+    # predict() tokenizes internally, so make sure its inputs follow the model
+    tokenizer = DeviceTokenizer(
+        _load_cached_first(AutoTokenizer.from_pretrained, repo_id, **kwargs),
+        model.device,
+        pad_to_multiple_of=PAD_TO_MULTIPLE_OF
+    )
+    if compile_model:
+        _compile_encoder(model, tokenizer)
+    return model, tokenizer
+
+def predict_sentences(model, tokenizer, sentences):
+    """
+    Run SocioCausaNet on a batch of sentences without autograd tracking
+
+    A compiled encoder gets fixed-size batches: the sentences are split into
+    chunks of COMPILED_BATCH_SIZE, the last one is filled up with
+    FILLER_SENTENCE, and the filler predictions are dropped. If the compiled
+    encoder fails on a batch, the model switches back to eager mode.
+
+    Args:
+        model: The loaded model
+        tokenizer: The loaded tokenizer
+        sentences: List of sentences
+
+    Returns:
+        list: One prediction dictionary per sentence
+    """
+    if "_eager_encoder" not in model.__dict__:
+        with torch.inference_mode():
+            return model.predict(sentences, tokenizer=tokenizer, **PREDICT_KWARGS)
+
+    results = []
+    for start in range(0, len(sentences), COMPILED_BATCH_SIZE):
+        batch = sentences[start:start + COMPILED_BATCH_SIZE]
+        padded = batch + [FILLER_SENTENCE] * (COMPILED_BATCH_SIZE - len(batch))
+        try:
+            with torch.inference_mode():
+                batch_results = model.predict(padded, tokenizer=tokenizer, **PREDICT_KWARGS)
+        except Exception:
+            # e.g. a recompile that fails at runtime; the eager encoder still works
+            _restore_eager_encoder(model)
+            return results + predict_sentences(model, tokenizer, sentences[start:])
+        results.extend(batch_results[:len(batch)])
+    return results
@@ -1,14 +1,82 @@
-import PyPDF2
-import nltk
-from nltk.tokenize import sent_tokenize
+import pymupdf
+import numpy as np
 import re
-import io
+import sys
+import threading
+from itertools import islice
+import streamlit as st
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
+# Patterns used on every sentence, compiled once
+_WHITESPACE_RE = re.compile(r'\s+')
+_ALPHA_RE = re.compile(r'[a-zA-Z]')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s.,!?;:\-()]')
+# Sentence boundary: whitespace after terminal punctuation, before a capital
+_SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+
+def _nltk_sent_tokenize(text):
+    """Split text with NLTK's Punkt tokenizer, downloading its data if needed"""
+    import nltk
+    from nltk.tokenize import sent_tokenize
+    
+    # Download required NLTK data
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt', quiet=True)
+    
+    return sent_tokenize(text)
+
+# Sentences are filtered in chunks of this size with vectorized masks
+_FILTER_CHUNK_SIZE = 4096
+
+_alpha_table = None
+
+def _get_alpha_table():
+    """Lookup table of str.isalpha() for every Unicode code point, built once"""
+    global _alpha_table
+    if _alpha_table is None:
+        _alpha_table = np.fromiter(
+            (chr(code).isalpha() for code in range(sys.maxunicode + 1)),
+            dtype=bool, count=sys.maxunicode + 1
+        )
+    return _alpha_table
+
+# Threads that extract PDFs concurrently; MuPDF itself is not thread-safe,
+# so only one of them parses at a time while the others split and filter
+PDF_WORKERS = 4
+_mupdf_lock = threading.Lock()
+
+def _pdf_to_text(data):
+    """
+    Parse PDF bytes with MuPDF, one document at a time across threads
+    
+    Args:
+        data: PDF file contents
+    
+    Returns:
+        str: Extracted text from the PDF
+    """
+    # MuPDF parses the document natively, much faster than a pure-Python reader
+    with _mupdf_lock, pymupdf.open(stream=data, filetype="pdf") as doc:
+        # Extract text from all pages
+        text = "".join(page.get_text() + "\n" for page in doc)
+    
+    return text
+
+@st.cache_data(show_spinner=False)
+def _extract_from_bytes(data):
+    """
+    Extract text from raw PDF bytes
+    
+    Cached on the file contents, so re-processing the same PDF is instant.
+    
+    Args:
+        data: PDF file contents
+    
+    Returns:
+        str: Extracted text from the PDF
+    """
+    return _pdf_to_text(data)
 
 def extract_text_from_pdf(pdf_file):
     """
@@ -21,71 +89,109 @@ def extract_text_from_pdf(pdf_file):
         str: Extracted text from the PDF
     """
     try:
-        # Create a PDF reader object
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file.read()))
-        
-        # Extract text from all pages
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text
+        return _extract_from_bytes(pdf_file.read())
     except Exception as e:
         raise Exception(f"Error extracting text from PDF: {str(e)}")
 
-def split_into_sentences(text):
+def split_into_sentences(text, use_nltk=False):
     """
-    Split text into sentences using NLTK
+    Split text into sentences
+    
+    A compiled regex splitter is used by default; it is far faster than
+    NLTK's Punkt and good enough for the short sentences kept by the filters.
     
     Args:
         text: Input text string
+        use_nltk: Use NLTK's Punkt tokenizer instead of the regex splitter
     
-    Returns:
-        list: List of sentences
+    Yields:
+        str: One sentence at a time
     """
     # Clean the text
-    text = re.sub(r'\s+', ' ', text)  # Replace multiple spaces with single space
+    text = _WHITESPACE_RE.sub(' ', text)  # Replace multiple spaces with single space
     text = text.strip()
+    if not text:
+        return
     
     # Split into sentences
-    sentences = sent_tokenize(text)
+    if use_nltk:
+        yield from _nltk_sent_tokenize(text)
+        return
     
-    return sentences
+    start = 0
+    for boundary in _SENTENCE_BOUNDARY_RE.finditer(text):
+        yield text[start:boundary.start()]
+        start = boundary.end()
+    yield text[start:]
 
 def filter_sentences(sentences, min_chars=15, max_chars=100):
     """
     Filter sentences based on character count and basic quality checks
     
     Args:
-        sentences: List of sentences
+        sentences: Iterable of sentences
         min_chars: Minimum number of characters
         max_chars: Maximum number of characters
     
-    Returns:
-        list: Filtered list of sentences
+    Yields:
+        str: Sentences that pass the filters
     """
-    filtered = []
+    # Clean sentences
+    stripped = (sentence.strip() for sentence in sentences)
+    alpha_table = _get_alpha_table()
     
-    for sentence in sentences:
-        # Clean sentence
-        sentence = sentence.strip()
+    while True:
+        chunk = list(islice(stripped, _FILTER_CHUNK_SIZE))
+        if not chunk:
+            return
         
         # Skip if too short or too long
-        if len(sentence) < min_chars or len(sentence) > max_chars:
+        lengths = np.fromiter(map(len, chunk), dtype=np.int64, count=len(chunk))
+        candidates = np.flatnonzero((lengths >= max(min_chars, 1)) & (lengths <= max_chars))
+        if candidates.size == 0:
             continue
+        kept = [chunk[i] for i in candidates]
+        kept_lengths = lengths[candidates]
+        
+        # Look at every character of the chunk at once as UTF-32 code points
+        codes = np.frombuffer(
+            "".join(kept).encode("utf-32-le", "surrogatepass"), dtype=np.uint32
+        )
+        starts = np.cumsum(kept_lengths) - kept_lengths
         
         # Skip if sentence doesn't contain alphabetic characters
-        if not re.search(r'[a-zA-Z]', sentence):
-            continue
+        lowered = codes | 0x20
+        ascii_letters = ((lowered >= ord('a')) & (lowered <= ord('z'))).astype(np.int64)
+        has_alpha = np.add.reduceat(ascii_letters, starts) > 0
         
         # Skip if sentence is mostly numbers or special characters
-        alpha_count = sum(c.isalpha() for c in sentence)
-        if alpha_count / len(sentence) < 0.5:
-            continue
+        alpha_counts = np.add.reduceat(alpha_table[codes].astype(np.int64), starts)
+        mostly_alpha = 2 * alpha_counts >= kept_lengths
         
-        filtered.append(sentence)
+        for keep, sentence in zip(has_alpha & mostly_alpha, kept):
+            if keep:
+                yield sentence
+
+@st.cache_data(show_spinner=False)
+def split_and_filter_sentences(text, min_chars=15, max_chars=100, use_nltk=False):
+    """
+    Split text into sentences and keep those passing the filters
+    
+    Cached on the text and the character limits, so moving the sliders back
+    to earlier values doesn't redo the work.
+    
+    Args:
+        text: Input text string
+        min_chars: Minimum number of characters
+        max_chars: Maximum number of characters
+        use_nltk: Use NLTK's Punkt tokenizer instead of the regex splitter
     
-    return filtered
+    Returns:
+        list: Filtered list of sentences
+    """
+    # Only the filtered sentences are materialized
+    sentences = split_into_sentences(text, use_nltk=use_nltk)
+    return list(filter_sentences(sentences, min_chars, max_chars))
 
 def clean_text(text):
     """
@@ -98,9 +204,9 @@ def clean_text(text):
         str: Cleaned text
     """
     # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE_RE.sub(' ', text)
     
     # Remove special characters but keep basic punctuation
-    text = re.sub(r'[^\w\s.,!?;:\-()]', '', text)
+    text = _SPECIAL_CHARS_RE.sub('', text)
     
     return text.strip()
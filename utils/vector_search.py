@@ -1,22 +1,192 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
 import faiss
-from typing import List, Dict, Any
+import torch
+import functools
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+import warnings
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class SearchHit(Mapping):
+    """
+    Read-only search result backed by the stored causal result
+    
+    Behaves like the result dictionary with 'score' added and 'relations'
+    replaced by the matching relations, without copying the dictionary.
+    Unlike a dict it can't be modified or passed to json.dumps directly;
+    use to_dict() for a plain copy.
+    """
+    
+    __slots__ = ('_result', 'score', 'relations')
+    
+    def __init__(self, result: Dict[str, Any], score: float, relations: List[Dict[str, Any]]):
+        self._result = result
+        self.score = score
+        self.relations = relations
+    
+    def __getitem__(self, key):
+        if key == 'score':
+            return self.score
+        if key == 'relations':
+            return self.relations
+        return self._result[key]
+    
+    def __iter__(self):
+        yield from self._result
+        if 'relations' not in self._result:
+            yield 'relations'
+        yield 'score'
+    
+    def __len__(self):
+        return len(self._result) + ('relations' not in self._result) + 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the hit as a new plain dictionary"""
+        return dict(self)
+    
+    def __repr__(self):
+        return f"SearchHit({dict(self)!r})"
 
 class VectorSearch:
     """Vector search class for semantic search over causal relationships"""
     
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
+    # Index types accepted by __init__
+    INDEX_TYPES = ('auto', 'flat', 'sq8', 'ivfpq', 'hnsw')
+    # With index_type="auto" and no GPU, corpora at least this large use IVF-PQ
+    # and smaller ones an 8-bit scalar-quantized flat scan
+    IVF_MIN_VECTORS = 10000
+    # HNSW graph: neighbours per node and candidate list sizes for building
+    # and (at least) for searching
+    HNSW_M = 32
+    HNSW_EF_CONSTRUCTION = 200
+    HNSW_MIN_EF_SEARCH = 64
+    # Seed for the queries sampled by calibrate(), and how close to the best
+    # achievable recall it settles when the target is out of reach
+    CALIBRATION_SEED = 0
+    CALIBRATION_RECALL_TOLERANCE = 0.02
+    # Texts per forward pass when encoding the corpus
+    ENCODE_BATCH_SIZE = 64
+    # Int8-quantized ONNX export published alongside the sentence-transformers models
+    ONNX_FILE_NAME = 'onnx/model_qint8_avx512_vnni.onnx'
+    # Number of distinct query embeddings kept in memory
+    QUERY_CACHE_SIZE = 4096
+    # Number of built indexes kept in cache_dir; the least recently used go first
+    CACHE_MAX_ENTRIES = 8
+    # Number of search result lists kept, and how similar a query's embedding
+    # must be to a cached one for its results to be reused
+    RESULT_CACHE_SIZE = 1024
+    RESULT_CACHE_MIN_SIMILARITY = 0.98
+    
+    def __init__(self, model_name='all-MiniLM-L6-v2', cache_dir: Optional[str] = '.cache',
+                 backend: Optional[str] = None, index_type: str = 'auto'):
         """
         Initialize the vector search with a sentence transformer model
         
         Args:
             model_name: Name of the sentence transformer model to use
+            cache_dir: Directory where built indexes are kept between runs
+                (None disables the on-disk cache)
+            backend: Encoder backend - "torch", "onnx" or "openvino"; by default
+                ONNX Runtime on CPU-only hosts and PyTorch when CUDA is available
+            index_type: FAISS index - "flat" (exact), "sq8" (8-bit scalar
+                quantized), "ivfpq", "hnsw" (graph over exact vectors), or
+                "auto" (exact flat search on a GPU, otherwise chosen by
+                corpus size)
         """
-        self.model = SentenceTransformer(model_name)
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}")
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.index_type = index_type
+        self.model, self.backend = self._load_encoder(model_name, backend)
+        # Repeated queries reuse their embedding instead of re-running the encoder
+        self._encode_query = functools.lru_cache(maxsize=self.QUERY_CACHE_SIZE)(self._encode_text)
+        # Search results keyed by quantized query embedding, least recently used first
+        self._result_cache = OrderedDict()
         self.index = None
+        # Kept alive for as long as an index is on the GPU
+        self._gpu_resources = None
+        # Path prefix of the files the index was last saved to or loaded from
+        self._index_path = None
         self.causal_results = []
         self.embeddings = None
+        # Column-wise copy of the results: sentence texts, and one row per
+        # relation with its cause, effect, relation dict and owning result
+        self._text = []
+        self._rel_cause = np.empty(0, dtype=object)
+        self._rel_effect = np.empty(0, dtype=object)
+        self._relations = np.empty(0, dtype=object)
+        self._rel_owner = np.empty(0, dtype=np.int32)
+        # Relations of result i sit at rows _rel_offsets[i]:_rel_offsets[i + 1]
+        # of the relation columns and the cause/effect embedding matrices
+        self._rel_offsets = np.zeros(1, dtype=np.int64)
+        self._cause_embeddings = None
+        self._effect_embeddings = None
+        # Lowercased causes/effects in the same row order, for substring matching
+        self._cause_lower = np.array([], dtype=str)
+        self._effect_lower = np.array([], dtype=str)
+        # Sorted unique causes/effects, recomputed whenever the results change
+        self._all_causes = []
+        self._all_effects = []
+    
+    def _load_encoder(self, model_name: str, backend: Optional[str]):
+        """
+        Load the sentence transformer, preferring an accelerated backend
+        
+        Falls back to PyTorch when the ONNX/OpenVINO extras of
+        sentence-transformers (3.2+) aren't installed or the model has no
+        export.
+        
+        Args:
+            model_name: Name of the sentence transformer model to use
+            backend: Requested backend, or None to choose automatically
+        
+        Returns:
+            tuple: (SentenceTransformer, name of the backend in use)
+        """
+        if backend is None:
+            backend = 'torch' if torch.cuda.is_available() else 'onnx'
+        
+        if backend in ('onnx', 'openvino'):
+            kwargs = {'model_kwargs': {'file_name': self.ONNX_FILE_NAME}} if backend == 'onnx' else {}
+            try:
+                model = SentenceTransformer(model_name, backend=backend, **kwargs)
+            # ImportError: extra not installed, TypeError: sentence-transformers
+            # too old for backends, OSError: no exported model to download
+            except (ImportError, TypeError, OSError) as e:
+                logger.warning("Could not load %s with the %s backend, using torch: %s", model_name, backend, e)
+            else:
+                logger.info("Encoding with %s on the %s backend", model_name, backend)
+                return model, backend
+        
+        logger.info("Encoding with %s on the torch backend", model_name)
+        return SentenceTransformer(model_name), 'torch'
+    
+    def _encode_text(self, text: str) -> np.ndarray:
+        """
+        Encode a single text into a normalized embedding
+        
+        Args:
+            text: Text to encode
+        
+        Returns:
+            np.ndarray: Read-only array of shape (1, dimension)
+        """
+        embedding = self.model.encode(
+            [text], convert_to_numpy=True, normalize_embeddings=True
+        ).astype(np.float32, copy=False)
+        # The array is shared through the query cache
+        embedding.setflags(write=False)
+        return embedding
     
     def build_index(self, causal_results: List[Dict[str, Any]]):
         """
@@ -25,35 +195,529 @@ class VectorSearch:
         Args:
             causal_results: List of causal relationship dictionaries
         """
-        self.causal_results = causal_results
-        
+        self._index_path = None
         if not causal_results:
+            self._set_results(causal_results)
             return
         
+        # Reuse the index built for the same results in an earlier run
+        cache_path = None
+        if self.cache_dir:
+            results_hash = self._results_hash(causal_results)
+            cache_path = os.path.join(self.cache_dir, f"vecidx-{results_hash}")
+            if self._manifest_hash(cache_path) == results_hash:
+                try:
+                    # load() derives the column arrays and lowercase mirrors
+                    # from the saved copy, which equals causal_results
+                    self.load(cache_path)
+                    self.causal_results = causal_results
+                    self._touch_cache_entry(cache_path)
+                    return
+                except (RuntimeError, OSError, ValueError, pickle.UnpicklingError):
+                    pass  # incomplete or unreadable cache entry, rebuild it
+        
+        self._set_results(causal_results)
+        
         # Create texts for embedding
+        pairs = [f"Cause: {cause} Effect: {effect} " for cause, effect in zip(self._rel_cause, self._rel_effect)]
         texts = []
-        for result in causal_results:
+        for idx, text in enumerate(self._text):
             # Combine sentence text with cause-effect pairs for better search
-            text = result['text'] + " "
-            for rel in result.get('relations', []):
-                text += f"Cause: {rel['cause']} Effect: {rel['effect']} "
-            texts.append(text)
+            start, end = self._rel_offsets[idx], self._rel_offsets[idx + 1]
+            texts.append(text + " " + "".join(pairs[start:end]))
         
-        # Generate embeddings
-        self.embeddings = self.model.encode(texts, show_progress_bar=True)
+        # Generate normalized embeddings (cosine similarity)
+        self.embeddings = self._encode_corpus(texts, show_progress_bar=True)
         
-        # Build FAISS index
-        dimension = self.embeddings.shape[1]
-        self.index = faiss.IndexFlatIP(dimension)  # Inner product (cosine similarity)
+        # Encode every cause and effect once, so relation filtering in search
+        # is a matrix-vector product instead of an encoder call per relation
+        self._cause_embeddings = self._encode_corpus(self._cause_lower.tolist())
+        self._effect_embeddings = self._encode_corpus(self._effect_lower.tolist())
         
-        # Normalize embeddings for cosine similarity
-        faiss.normalize_L2(self.embeddings)
+        # Build FAISS index
+        self.index = self._create_index(self.embeddings)
         self.index.add(self.embeddings)
+        self.index = self._to_gpu(self.index)
+        
+        if cache_path:
+            try:
+                self.save(cache_path)
+                # The index holds its own copy of the corpus vectors, so the
+                # float32 matrix can live on disk and be paged in only when read
+                self.embeddings = np.load(f"{cache_path}.embeddings.npy", mmap_mode='r')
+            except OSError:
+                # The cache is best-effort (read-only or invalid cache_dir,
+                # full disk); the index built in memory works without it
+                self._index_path = None
+            else:
+                self._evict_cache_entries()
+    
+    @staticmethod
+    def _touch_cache_entry(cache_path: str):
+        """Mark a cache entry as recently used"""
+        try:
+            os.utime(f"{cache_path}.manifest.json")
+        except OSError:
+            pass
+    
+    def _evict_cache_entries(self):
+        """
+        Delete the least recently used indexes beyond CACHE_MAX_ENTRIES from cache_dir
+        
+        An entry's manifest is removed first, so a partly deleted entry is
+        never mistaken for a complete one. Files that can't be removed (e.g.
+        mapped by another session on Windows) are left for a later build.
+        """
+        suffix = '.manifest.json'
+        try:
+            manifests = [
+                entry for entry in os.scandir(self.cache_dir)
+                if entry.name.startswith('vecidx-') and entry.name.endswith(suffix)
+            ]
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        
+        manifests.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for manifest in manifests[self.CACHE_MAX_ENTRIES:]:
+            prefix = manifest.name[:-len(suffix)] + '.'
+            stale = [manifest.name] + [name for name in names if name.startswith(prefix) and name != manifest.name]
+            for name in stale:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
     
-    def search(self, query: str, query_type: str = "general search", top_k: int = 5, similarity_threshold: float = 0.25):
+    def _set_results(self, causal_results: List[Dict[str, Any]]):
+        """
+        Store the causal results and the column arrays derived from them
+        
+        Args:
+            causal_results: List of causal relationship dictionaries
+        """
+        self.causal_results = causal_results
+        self._result_cache.clear()
+        self._text = [result['text'] for result in causal_results]
+        counts = [len(result.get('relations', [])) for result in causal_results]
+        self._rel_offsets = np.cumsum([0] + counts, dtype=np.int64)
+        self._rel_owner = np.repeat(np.arange(len(causal_results), dtype=np.int32), counts)
+        
+        relations = [rel for result in causal_results for rel in result.get('relations', [])]
+        self._relations = np.empty(len(relations), dtype=object)
+        self._relations[:] = relations
+        self._rel_cause = np.array([rel['cause'] for rel in relations], dtype=object)
+        self._rel_effect = np.array([rel['effect'] for rel in relations], dtype=object)
+        self._cause_lower = np.array([cause.lower() for cause in self._rel_cause], dtype=str)
+        self._effect_lower = np.array([effect.lower() for effect in self._rel_effect], dtype=str)
+        self._all_causes = np.unique(self._rel_cause).tolist()
+        self._all_effects = np.unique(self._rel_effect).tolist()
+    
+    def _reconstruct(self, idx: int, score: float, rel_rows: Optional[np.ndarray] = None) -> SearchHit:
+        """
+        Build the public result for one stored causal result
+        
+        Args:
+            idx: Index of the causal result
+            score: Similarity score of the hit
+            rel_rows: Relation rows to include, or None for all of its relations
+        
+        Returns:
+            SearchHit: Mapping view of the result
+        """
+        result = self.causal_results[idx]
+        if rel_rows is None:
+            return SearchHit(result, score, result.get('relations', []))
+        return SearchHit(result, score, self._relations[rel_rows].tolist())
+    
+    def _encode_corpus(self, texts: List[str], show_progress_bar: bool = False) -> np.ndarray:
+        """
+        Encode corpus texts into normalized embeddings
+        
+        Args:
+            texts: Texts to encode
+            show_progress_bar: Whether to display the encoding progress
+        
+        Returns:
+            np.ndarray: C-contiguous float32 array of shape (len(texts), dimension)
+        """
+        if not texts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        # Repeated texts (boilerplate sentences, recurring causes) are encoded once
+        unique_texts, inverse = np.unique(np.array(texts, dtype=object), return_inverse=True)
+        # encode() already length-sorts texts into batches to limit padding
+        embeddings = self.model.encode(
+            unique_texts.tolist(),
+            batch_size=self.ENCODE_BATCH_SIZE,
+            show_progress_bar=show_progress_bar,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        ).astype(np.float32, copy=False)
+        # FAISS copies any input that isn't C-contiguous float32
+        return np.ascontiguousarray(embeddings[inverse.ravel()], dtype=np.float32)
+    
+    def _create_index(self, embeddings: np.ndarray):
+        """
+        Create an (empty, trained) FAISS index for the configured index type
+        
+        "flat" is an exact inner-product scan. "sq8" scans 8-bit scalar
+        quantized vectors, a quarter of the memory traffic for a negligible
+        recall loss. "ivfpq" only visits nprobe of the nlist clusters per
+        query and stores vectors as 8-bit product-quantization codes.
+        "hnsw" walks a neighbour graph over the unquantized vectors, so a
+        query compares against O(log N) of them without quantization noise.
+        An "ivfpq" corpus too small to train its quantizers (fewer than
+        nlist or 256 vectors) gets an "sq8" index instead.
+        
+        Args:
+            embeddings: Normalized corpus embeddings
+        
+        Returns:
+            faiss.Index: Index ready for add()
+        """
+        num_vectors, dimension = embeddings.shape
+        index_type = self.index_type
+        if index_type == 'auto':
+            if self._gpu_available():
+                index_type = 'flat'  # searched on the GPU by _to_gpu()
+            else:
+                index_type = 'sq8' if num_vectors < self.IVF_MIN_VECTORS else 'ivfpq'
+        
+        nlist = int(4 * np.sqrt(num_vectors))
+        # k-means needs a training vector per IVF cluster and per PQ centroid
+        if index_type == 'ivfpq' and num_vectors < max(nlist, 2 ** 8):
+            index_type = 'sq8'
+        
+        if index_type == 'flat':
+            return faiss.IndexFlatIP(dimension)  # Inner product (cosine similarity)
+        
+        if index_type == 'sq8':
+            index = faiss.IndexScalarQuantizer(
+                dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT
+            )
+            index.train(embeddings)
+            return index
+        
+        if index_type == 'hnsw':
+            index = faiss.IndexHNSWFlat(dimension, self.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.HNSW_EF_CONSTRUCTION
+            # Lower bound for efSearch in search(); calibrate() may tune it
+            index.hnsw.efSearch = self.HNSW_MIN_EF_SEARCH
+            return index
+        
+        # Roughly 4 dimensions per sub-quantizer; the count must divide dimension
+        num_subquantizers = max(m for m in range(1, dimension // 4 + 1) if dimension % m == 0)
+        index = faiss.index_factory(
+            dimension, f"IVF{nlist},PQ{num_subquantizers}x8", faiss.METRIC_INNER_PRODUCT
+        )
+        index.train(embeddings)
+        index.nprobe = max(1, nlist // 32)
+        return index
+    
+    @staticmethod
+    def _gpu_available() -> bool:
+        """Whether this FAISS build has GPU support and a GPU is visible"""
+        if not hasattr(faiss, 'StandardGpuResources'):
+            return False
+        try:
+            return faiss.get_num_gpus() > 0
+        except RuntimeError:
+            return False
+    
+    def _to_gpu(self, index):
+        """
+        Move a flat index to the first GPU when the FAISS build supports it
+        
+        An exact flat scan becomes a single matrix product on the GPU. The
+        quantized and graph indexes stay on the CPU, where their search
+        parameters are tuned. The embeddings stay in host memory.
+        
+        Args:
+            index: CPU FAISS index
+        
+        Returns:
+            faiss.Index: The GPU copy, or index itself if it stays on the CPU
+        """
+        self._gpu_resources = None
+        if not isinstance(index, faiss.IndexFlat) or not self._gpu_available():
+            return index
+        try:
+            resources = faiss.StandardGpuResources()
+            gpu_index = faiss.index_cpu_to_gpu(resources, 0, index)
+        except RuntimeError:
+            return index
+        self._gpu_resources = resources
+        return gpu_index
+    
+    def _results_hash(self, causal_results: List[Dict[str, Any]]) -> str:
+        """
+        Hash the causal results together with everything that shapes the index
+        
+        Args:
+            causal_results: List of causal relationship dictionaries
+        
+        Returns:
+            str: SHA-256 hex digest
+        """
+        # Backends produce slightly different embeddings, so each gets its own entry
+        payload = self.model_name + self.backend + self.index_type + json.dumps(
+            causal_results, sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _read_manifest(path: str) -> Dict[str, Any]:
+        """Read a saved index manifest, or an empty dict if there is none"""
+        try:
+            with open(f"{path}.manifest.json", encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @classmethod
+    def _manifest_hash(cls, path: str) -> Optional[str]:
+        """Read the results hash from a saved index manifest, if there is one"""
+        return cls._read_manifest(path).get('hash')
+    
+    # Arrays saved next to the FAISS index
+    _SAVED_ARRAYS = ('embeddings', '_cause_embeddings', '_effect_embeddings')
+    
+    def save(self, path: str):
+        """
+        Save the index, embeddings and causal results to disk
+        
+        Writes <path>.faiss, one .npy file per embedding matrix,
+        <path>.results.pkl and finally <path>.manifest.json, whose presence
+        marks a complete save. Saving to the path the index was loaded from
+        (or last saved to) only rewrites the manifest: the other files
+        already hold this index, and the embeddings and index codes are
+        memory-mapped from them, which Windows won't let us replace.
+        
+        Args:
+            path: Path prefix for the saved files
+        """
+        if path == self._index_path:
+            self._write_manifest(path)
+            return
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        for name in self._SAVED_ARRAYS:
+            array = getattr(self, name)
+            self._replace_file(f"{path}.{name.lstrip('_')}.npy", lambda tmp: np.save(tmp, array))
+        index = self.index
+        if self._gpu_resources is not None:
+            index = faiss.index_gpu_to_cpu(index)
+        self._replace_file(f"{path}.faiss", lambda tmp: faiss.write_index(index, tmp))
+        
+        def write_results(tmp):
+            with open(tmp, 'wb') as f:
+                pickle.dump(self.causal_results, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._replace_file(f"{path}.results.pkl", write_results)
+        
+        self._write_manifest(path)
+        self._index_path = path
+    
+    def _write_manifest(self, path: str):
+        """
+        Write <path>.manifest.json for the current index
+        
+        Besides identifying the saved results, the manifest carries the
+        search parameters (nprobe / efSearch), which load() applies.
+        
+        Args:
+            path: Path prefix for the saved files
+        """
+        manifest = {
+            'hash': self._results_hash(self.causal_results),
+            'model_name': self.model_name,
+            'backend': self.backend,
+            'index_type': self.index_type,
+            'search_params': self._search_params()
+        }
+        
+        def write_manifest(tmp):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+        self._replace_file(f"{path}.manifest.json", write_manifest)
+    
+    @staticmethod
+    def _replace_file(path: str, write):
+        """
+        Write a file next to its destination, then move it into place
+        
+        An interrupted save leaves the previous file intact instead of a
+        truncated one. Each call gets its own temporary file, so sessions
+        saving the same index at the same time don't write into each other's.
+        
+        Args:
+            path: Destination file
+            write: Callable that writes the file at the path it is given
+        """
+        # Keep the extension last: np.save appends ".npy" to names without it
+        fd, tmp = tempfile.mkstemp(
+            dir=os.path.dirname(path) or None,
+            prefix=f"{os.path.basename(path)}.",
+            suffix=os.path.splitext(path)[1]
+        )
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+    
+    def load(self, path: str):
+        """
+        Load an index previously written by save()
+        
+        The corpus embeddings and the codes of flat, SQ8 and HNSW indexes are
+        memory-mapped, so they don't count against resident memory until
+        pages are touched; the HNSW graph and IVF inverted lists are read
+        into memory. The search parameters recorded in the manifest are
+        applied to the index.
+        
+        Args:
+            path: Path prefix passed to save()
+        """
+        for name in ('faiss', 'results.pkl') + tuple(f"{n.lstrip('_')}.npy" for n in self._SAVED_ARRAYS):
+            if not os.path.exists(f"{path}.{name}"):
+                raise FileNotFoundError(f"Missing saved index file: {path}.{name}")
+        
+        # IO_FLAG_MMAP only maps IVF lists (and makes write_index emit a file
+        # that points into this one); IO_FLAG_MMAP_IFC maps the flat codes.
+        # Older FAISS builds without it read the whole index.
+        index = faiss.read_index(f"{path}.faiss", getattr(faiss, 'IO_FLAG_MMAP_IFC', 0))
+        self._apply_search_params(index, self._read_manifest(path).get('search_params', {}))
+        self.index = self._to_gpu(index)
+        for name in self._SAVED_ARRAYS:
+            mmap_mode = 'r' if name == 'embeddings' else None
+            setattr(self, name, np.load(f"{path}.{name.lstrip('_')}.npy", mmap_mode=mmap_mode))
+        with open(f"{path}.results.pkl", 'rb') as f:
+            self._set_results(pickle.load(f))
+        self._index_path = path
+    
+    @staticmethod
+    def _apply_search_params(index, params: Dict[str, int]):
+        """Set nprobe / efSearch on an index, as returned by _search_params()"""
+        if 'efSearch' in params and isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = int(params['efSearch'])
+        if 'nprobe' in params and isinstance(index, faiss.IndexIVF):
+            index.nprobe = int(params['nprobe'])
+    
+    def _search_params(self) -> Dict[str, int]:
+        """Search-time knobs of the current index (nprobe / efSearch), if it has any"""
+        if isinstance(self.index, faiss.IndexHNSW):
+            return {'efSearch': int(self.index.hnsw.efSearch)}
+        if isinstance(self.index, faiss.IndexIVF):
+            return {'nprobe': int(self.index.nprobe)}
+        return {}
+    
+    def calibrate(self, target_recall: float = 0.95, sample_queries: int = 200,
+                  top_k: int = 5) -> Optional[int]:
+        """
+        Pick the smallest nprobe (IVF-PQ) or efSearch (HNSW) that reaches a target recall
+        
+        Causes and effects from the corpus serve as sample queries. Their
+        search candidates are checked against an exact flat search (a
+        candidate counts if it scores as high as the k-th exact one), and the
+        knob is binary searched for the lowest value whose mean recall is at
+        least target_recall. When even the largest value falls short (PQ
+        error typically caps IVF-PQ recall below 0.95), a warning is issued
+        and the lowest value within CALIBRATION_RECALL_TOLERANCE of that
+        best recall is used instead of an exhaustive scan. efSearch starts at
+        top_k * 4, the least search() uses anyway. The value is set on the
+        index and, if the index was saved or loaded, recorded in its manifest;
+        the index files themselves are not rewritten.
+        
+        Args:
+            target_recall: Required fraction of the exact candidates
+            sample_queries: Number of queries to sample
+            top_k: Result count the calibration is for
+        
+        Returns:
+            int: The chosen nprobe/efSearch, or None if the index has no such knob
+        """
+        params = self._search_params()
+        if not params or self.embeddings is None or not len(self.embeddings):
+            return None
+        
+        queries = np.concatenate([self._cause_embeddings, self._effect_embeddings])
+        if not len(queries):
+            queries = self.embeddings
+        rng = np.random.default_rng(self.CALIBRATION_SEED)
+        picked = rng.choice(len(queries), size=min(sample_queries, len(queries)), replace=False)
+        queries = np.ascontiguousarray(queries[np.sort(picked)], dtype=np.float32)
+        
+        # Same candidate count as search() for this top_k
+        k = min(top_k * 3, len(self.embeddings))
+        corpus = np.ascontiguousarray(self.embeddings, dtype=np.float32)
+        exact = faiss.IndexFlatIP(corpus.shape[1])
+        exact.add(corpus)
+        true_scores, _ = exact.search(queries, k)
+        # A candidate counts if it scores at least the k-th exact neighbour,
+        # so ties between duplicate texts don't read as misses
+        kth_scores = true_scores[:, -1:] - 1e-6
+        
+        if 'nprobe' in params:
+            ivf = self.index
+            low, high = 1, ivf.nlist
+            def set_knob(value):
+                ivf.nprobe = value
+        else:
+            hnsw = self.index.hnsw
+            # search() never runs HNSW with an efSearch below top_k * 4
+            low = max(k, top_k * 4)
+            high = max(low, len(self.embeddings))
+            def set_knob(value):
+                hnsw.efSearch = value
+        
+        def recall(value):
+            set_knob(value)
+            _, found = self.index.search(queries, k)
+            # Rescore exactly, since quantized indexes report approximate scores
+            scores = np.einsum('qkd,qd->qk', corpus[np.maximum(found, 0)], queries)
+            return float(np.mean((found >= 0) & (scores >= kth_scores)))
+        
+        best_recall = recall(high)
+        if best_recall < target_recall:
+            warnings.warn(
+                f"Recall {target_recall} is out of reach for this index (at most "
+                f"{best_recall:.3f}); calibrating to within "
+                f"{self.CALIBRATION_RECALL_TOLERANCE} of that instead",
+                stacklevel=2
+            )
+            target_recall = best_recall - self.CALIBRATION_RECALL_TOLERANCE
+        
+        # Recall grows with the knob; find the first value at or above target
+        while low < high:
+            middle = (low + high) // 2
+            if recall(middle) >= target_recall:
+                high = middle
+            else:
+                low = middle + 1
+        set_knob(low)
+        self._result_cache.clear()
+        
+        if self._index_path:
+            self._write_manifest(self._index_path)
+        return low
+    
+    def search(self, query: str, query_type: str = "general search", top_k: int = 5,
+               similarity_threshold: float = 0.25) -> List[SearchHit]:
         """
         Search for relevant causal relationships
         
+        Results are cached by query embedding, so a query whose embedding is
+        nearly identical to an earlier one (RESULT_CACHE_MIN_SIMILARITY)
+        gets that query's results back. Relation queries also key on the
+        query text, since their substring matching depends on it.
+        
         Args:
             query: Search query string
             query_type: Type of query - "find effects", "find causes", or "general search"
@@ -61,7 +725,9 @@ class VectorSearch:
             similarity_threshold: Minimum similarity score for a result to be included
         
         Returns:
-            list: List of relevant causal relationships with scores
+            list: SearchHit mappings of the relevant causal relationships with
+                scores. They are read-only views of the stored results, so
+                call to_dict() on a hit before modifying or serializing it.
         """
         if self.index is None or not self.causal_results:
             return []
@@ -69,94 +735,128 @@ class VectorSearch:
         # Clean query
         query = query.strip().lower()
         
-        # Encode query
-        query_embedding = self.model.encode([query])
-        faiss.normalize_L2(query_embedding)
+        # Encode query (no copy unless the encoder returned a strided array)
+        query_embedding = np.ascontiguousarray(self._encode_query(query), dtype=np.float32)
+        
+        relation_query = query_type in ("find effects", "find causes")
+        # Rounding to 1/64 steps buckets nearby embeddings under the same key
+        cache_key = (
+            np.round(query_embedding[0] * 64).astype(np.int8).tobytes(),
+            query_type, top_k, similarity_threshold, query if relation_query else None
+        )
+        cached = self._result_cache.get(cache_key)
+        if cached is not None and float(cached[0] @ query_embedding[0]) >= self.RESULT_CACHE_MIN_SIMILARITY:
+            self._result_cache.move_to_end(cache_key)
+            return list(cached[1])
         
+        results = self._search_index(query, query_embedding, query_type, top_k, similarity_threshold)
+        self._result_cache[cache_key] = (query_embedding[0], results)
+        self._result_cache.move_to_end(cache_key)
+        if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        return list(results)
+    
+    def _search_index(self, query: str, query_embedding: np.ndarray, query_type: str,
+                      top_k: int, similarity_threshold: float) -> List[SearchHit]:
+        """
+        Run a search against the FAISS index (the uncached part of search())
+        
+        Args:
+            query: Lowercased search query
+            query_embedding: Normalized query embedding of shape (1, dimension)
+            query_type: Type of query - "find effects", "find causes", or "general search"
+            top_k: Number of top results to return
+            similarity_threshold: Minimum similarity score for a result to be included
+        
+        Returns:
+            list: SearchHit mappings of the relevant causal relationships with scores
+        """
         # Search with more candidates for filtering
         search_k = min(top_k * 3, len(self.causal_results))
-        scores, indices = self.index.search(query_embedding, search_k)
-        
-        # Process results based on query type
-        results = []
-        for score, idx in zip(scores[0], indices[0]):
-            if idx == -1:
-                continue
-            if score < similarity_threshold:
-                continue
-            result = self.causal_results[idx].copy()
-            result['score'] = float(score)
-            
-            # Filter based on query type
-            if query_type == "find effects":
-                matching_relations = []
-                for rel in result.get('relations', []):
-                    cause_lower = rel['cause'].lower()
-                    if query in cause_lower or cause_lower in query:
-                        matching_relations.append(rel)
-                    else:
-                        cause_similarity = self._text_similarity(query, rel['cause'])
-                        if cause_similarity > similarity_threshold:
-                            matching_relations.append(rel)
-                if matching_relations:
-                    result['relations'] = matching_relations
-                    results.append(result)
-            elif query_type == "find causes":
-                matching_relations = []
-                for rel in result.get('relations', []):
-                    effect_lower = rel['effect'].lower()
-                    if query in effect_lower or effect_lower in query:
-                        matching_relations.append(rel)
-                    else:
-                        effect_similarity = self._text_similarity(query, rel['effect'])
-                        if effect_similarity > similarity_threshold:
-                            matching_relations.append(rel)
-                if matching_relations:
-                    result['relations'] = matching_relations
-                    results.append(result)
-            else:  # General search
-                if score > similarity_threshold:
-                    results.append(result)
-            if len(results) >= top_k:
-                break
-        results.sort(key=lambda x: x['score'], reverse=True)
-        return results[:top_k]
-    
-    def _text_similarity(self, text1: str, text2: str) -> float:
-        """
-        Calculate semantic similarity between two texts
-        
-        Args:
-            text1: First text
-            text2: Second text
+        params = None
+        if isinstance(self.index, faiss.IndexHNSW):
+            # Passed per call, so the stored index isn't mutated between queries
+            params = faiss.SearchParametersHNSW(efSearch=max(top_k * 4, self.index.hnsw.efSearch))
+        scores, indices = self.index.search(query_embedding, search_k, params=params)
+        
+        # FAISS returns candidates best first, so filtering keeps them sorted
+        scores, indices = scores[0], indices[0]
+        if query_type in ("find effects", "find causes"):
+            keep = (indices != -1) & (scores >= similarity_threshold)
+        else:  # General search
+            keep = (indices != -1) & (scores > similarity_threshold)
+        scores, indices = scores[keep], indices[keep]
+        
+        if query_type not in ("find effects", "find causes"):
+            return [
+                self._reconstruct(idx, score)
+                for score, idx in zip(scores[:top_k].tolist(), indices[:top_k].tolist())
+            ]
+        
+        # Matching relation rows come grouped by candidate, best candidate first;
+        # candidates without any match simply don't appear
+        rows = self._match_relations(query, query_embedding, query_type, indices, similarity_threshold)
+        if not rows.size:
+            return []
+        owners = self._rel_owner[rows]
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(owners)) + 1))
+        # Only the first top_k candidates with a match become results
+        end = starts[top_k] if len(starts) > top_k else rows.size
+        groups = np.split(rows[:end], starts[1:top_k])
+        score_of = dict(zip(indices.tolist(), scores.tolist()))
+        return [
+            self._reconstruct(owner, score_of[owner], group)
+            for owner, group in zip(owners[starts[:top_k]].tolist(), groups)
+        ]
+    
+    def _match_relations(self, query: str, query_embedding: np.ndarray, query_type: str,
+                         candidate_ids: np.ndarray, similarity_threshold: float) -> np.ndarray:
+        """
+        Find the relations of each candidate whose cause (or effect) matches the query
+        
+        A relation matches when its lowercased cause/effect contains the query,
+        is contained in it, or is more similar than similarity_threshold. The
+        similarity is a dot product with the cause/effect embeddings stored by
+        build_index, computed for all candidates' relations at once.
+        
+        Args:
+            query: Lowercased search query
+            query_embedding: Normalized query embedding of shape (1, dimension)
+            query_type: "find effects" (match causes) or "find causes" (match effects)
+            candidate_ids: Result indices returned by the FAISS search (-1 for none)
+            similarity_threshold: Minimum similarity for a semantic match
         
         Returns:
-            float: Similarity score (0-1)
+            np.ndarray: Matching relation rows, grouped by candidate in candidate order
         """
-        embeddings = self.model.encode([text1.lower(), text2.lower()])
-        faiss.normalize_L2(embeddings)
+        if query_type == "find effects":
+            side_lower, side_embeddings = self._cause_lower, self._cause_embeddings
+        else:
+            side_lower, side_embeddings = self._effect_lower, self._effect_embeddings
+        
+        # Rows of the relation arrays belonging to the candidates, back to back
+        valid = candidate_ids >= 0
+        ids = np.where(valid, candidate_ids, 0)
+        starts = self._rel_offsets[ids]
+        counts = np.where(valid, self._rel_offsets[ids + 1] - starts, 0)
+        bounds = np.concatenate(([0], np.cumsum(counts)))
+        rows = np.arange(bounds[-1]) + np.repeat(starts - bounds[:-1], counts)
+        
+        lower = side_lower[rows]
+        matches = (np.char.find(lower, query) >= 0) | (np.char.find(query, lower) >= 0)
+        matches |= side_embeddings[rows] @ query_embedding[0] > similarity_threshold
         
-        # Compute cosine similarity
-        similarity = np.dot(embeddings[0], embeddings[1])
-        return float(similarity)
+        return rows[matches]
     
     def get_all_causes(self) -> List[str]:
         """Get all unique causes from the causal relationships"""
-        causes = set()
-        for result in self.causal_results:
-            for rel in result.get('relations', []):
-                causes.add(rel['cause'])
-        return sorted(list(causes))
+        return list(self._all_causes)
     
     def get_all_effects(self) -> List[str]:
         """Get all unique effects from the causal relationships"""
-        effects = set()
-        for result in self.causal_results:
-            for rel in result.get('relations', []):
-                effects.add(rel['effect'])
-        return sorted(list(effects))
+        return list(self._all_effects)
     
-    def search_by_cause(self, cause: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def search_by_cause(self, cause: str, top_k: int = 5) -> List[SearchHit]:
         """
         Search for all effects of a given cause
         
@@ -165,11 +865,11 @@ class VectorSearch:
             top_k: Number of results to return
         
         Returns:
-            list: List of relevant effects
+            list: SearchHit mappings of the relevant effects
         """
         return self.search(cause, query_type="find effects", top_k=top_k)
     
-    def search_by_effect(self, effect: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def search_by_effect(self, effect: str, top_k: int = 5) -> List[SearchHit]:
         """
         Search for all causes of a given effect
         
@@ -178,6 +878,6 @@ class VectorSearch:
             top_k: Number of results to return
         
         Returns:
-            list: List of relevant causes
+            list: SearchHit mappings of the relevant causes
         """
         return self.search(effect, query_type="find causes", top_k=top_k)